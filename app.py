@@ -1,34 +1,78 @@
 import streamlit as st
 import os
-import json
+import asyncio
+import re
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
 from datetime import datetime
-from dotenv import load_dotenv
+from operator import itemgetter
+from typing import TYPE_CHECKING, List, TypedDict
 
-import google.generativeai as genai
-from supabase import create_client, Client
+import fastjsonschema
+import orjson
+
+import plan_cache
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 # -------------------------
 # Configuration and Setup
 # -------------------------
-load_dotenv()
+# google.generativeai, supabase and dotenv are imported lazily inside cached functions, so the
+# script reruns Streamlit performs on every widget interaction never touch them.
 st.set_page_config(page_title="Smart Task Planner", page_icon="🎯", layout="wide")
 
+
+@st.cache_resource(show_spinner=False)
+def _bootstrap():
+    """Loads the .env file once per process."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+_bootstrap()
+
 # --- API Key Configuration ---
+@st.cache_resource(show_spinner=False)
+def _configure_genai(api_key: str):
+    """Imports and configures the Gemini SDK once per process, returning the module.
+
+    genai.configure() throws away the SDK's cached clients, so running it on every rerun
+    would drop the pooled HTTP/2 gRPC channel and pay a new TLS handshake on the next call.
+    """
+    import google.generativeai as genai
+
+    genai.configure(
+        api_key=api_key,
+        transport="grpc",
+        client_options={"api_endpoint": "generativelanguage.googleapis.com"},
+    )
+    return genai
+
+
 try:
     API_KEY = os.environ["GOOGLE_API_KEY"]
-    genai.configure(api_key=API_KEY)
 except KeyError:
     st.error("🚨 Missing Google API key. Please add it to your environment variables.")
     st.stop()
-except Exception as e:
-    st.error(f"🚨 An error occurred during API configuration: {e}")
-    st.stop()
 
 # --- Supabase Configuration ---
+@st.cache_resource(show_spinner=False)
+def _get_supabase(url: str, key: str) -> "Client":
+    """Imports supabase and creates its client once per process, so its HTTP connections survive reruns."""
+    from supabase import create_client
+
+    return create_client(url, key)
+
+
 try:
     SUPABASE_URL = os.environ["SUPABASE_URL"]
     SUPABASE_KEY = os.environ["SUPABASE_KEY"]
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    supabase: "Client" = _get_supabase(SUPABASE_URL, SUPABASE_KEY)
 except KeyError as e:
     st.error(f"🚨 Missing Supabase credentials: {e}. Please add SUPABASE_URL and SUPABASE_KEY to your environment.")
     st.stop()
@@ -47,6 +91,122 @@ AVAILABLE_MODELS = {
     "Gemini 2.0 Flash - Stable": "models/gemini-2.0-flash",
 }
 
+# Deployers can preselect a model with PLANNER_MODEL; unknown names fall back to the fastest
+DEFAULT_MODEL = os.environ.get("PLANNER_MODEL", "models/gemini-2.0-flash-exp")
+_MODEL_NAMES = list(AVAILABLE_MODELS.values())
+DEFAULT_MODEL_INDEX = _MODEL_NAMES.index(DEFAULT_MODEL) if DEFAULT_MODEL in _MODEL_NAMES else 0
+
+# -------------------------
+# Plan Schema
+# -------------------------
+class Task(TypedDict):
+    task_id: int
+    task_name: str
+    description: str
+    dependencies: List[int]
+    duration_days: int
+
+
+# Response schemas. Gemini writes each task with CompactTask's short keys, which cost fewer
+# output tokens than Task's field names; _expand_task maps them back as tasks are parsed.
+class CompactTask(TypedDict):
+    id: int
+    name: str
+    desc: str
+    deps: List[int]
+    days: int
+
+
+COMPACT_TASK_KEYS = {
+    "id": "task_id",
+    "name": "task_name",
+    "desc": "description",
+    "deps": "dependencies",
+    "days": "duration_days",
+}
+
+
+class Plan(TypedDict):
+    plan: List[CompactTask]
+
+
+class GoalPlan(TypedDict):
+    goal: str
+    plan: List[CompactTask]
+
+
+class PlanBatch(TypedDict):
+    plans: List[GoalPlan]
+
+
+class PhaseList(TypedDict):
+    phases: List[str]
+
+
+# JSON Schema mirror of Task/Plan, compiled once into generated validator functions.
+TASK_SCHEMA = {
+    "type": "object",
+    "required": ["task_id", "task_name", "description", "dependencies", "duration_days"],
+    "properties": {
+        "task_id": {"type": "integer", "minimum": 1},
+        "task_name": {"type": "string"},
+        "description": {"type": "string"},
+        "dependencies": {"type": "array", "items": {"type": "integer"}},
+        "duration_days": {"type": "integer", "minimum": 0},
+    },
+}
+PLAN_SCHEMA = {
+    "type": "object",
+    "required": ["plan"],
+    "properties": {"plan": {"type": "array", "items": TASK_SCHEMA}},
+}
+_validate_task = fastjsonschema.compile(TASK_SCHEMA)
+_validate_plan = fastjsonschema.compile(PLAN_SCHEMA)
+
+
+@dataclass(frozen=True)
+class TaskView:
+    """Render-ready strings for a task, built once so reruns only hand them to Streamlit."""
+    __slots__ = ("label", "body")
+    label: str
+    body: str
+
+    @classmethod
+    def from_task(cls, task: dict) -> "TaskView":
+        """Builds a view from a task dict, defaulting any field older stored plans lack."""
+        get = task.get
+        dependencies = get("dependencies")
+        deps_str = ", ".join([str(dep) for dep in dependencies]) if dependencies else "None"
+        return cls(
+            f"**Task {get('task_id', '?')}: {get('task_name', 'Unnamed Task')}** ({get('duration_days', '?')} days)",
+            f"**Description:** {get('description', 'No description provided.')}\n\n**Dependencies:** Task(s) {deps_str}",
+        )
+
+
+def _expand_task(task):
+    """Renames a response task's compact keys to the Task field names; non-objects pass through."""
+    if not isinstance(task, dict):
+        return task
+    return {COMPACT_TASK_KEYS.get(key, key): value for key, value in task.items()}
+
+
+def _add_display_fields(task: dict) -> dict:
+    """Attaches the task's TaskView, so rerenders do no per-task lookups or conversions."""
+    task["_view"] = TaskView.from_task(task)
+    return task
+
+
+def _strip_display_fields(plan_json: dict) -> dict:
+    """Returns plan_json without the underscore-prefixed display fields, for storage."""
+    return {
+        **plan_json,
+        "plan": [
+            {key: value for key, value in task.items() if not key.startswith("_")}
+            for task in plan_json.get("plan", [])
+        ],
+    }
+
+
 # -------------------------
 # Database Functions
 # -------------------------
@@ -56,7 +216,7 @@ def save_plan_to_db(goal: str, model_name: str, plan_json: dict):
         data = {
             "goal": goal,
             "model_used": model_name,
-            "plan_json": plan_json
+            "plan_json": _strip_display_fields(plan_json)
         }
         result = supabase.table("task_plans").insert(data).execute()
         return {"success": True, "data": result.data}
@@ -105,88 +265,644 @@ def delete_plan(plan_id: str):
 # -------------------------
 # Core Function
 # -------------------------
-def generate_plan(goal: str, model_name: str):
-    """Generates a structured project plan from a user's goal using the Gemini API."""
-    if not goal:
+# Prompts, built once at import. The response schema enforces the JSON shape, so they only
+# carry what it cannot express. The instructions go in the model's system instruction and
+# stay byte-identical between calls, so only the short goal part varies per request.
+PLAN_SYSTEM_PROMPT = """You are an expert project manager AI. Break the user's goal into a complete, logical, sequential task plan.
+Each task has an id (starting at 1), a name, a desc, deps (the ids that must finish first) and days (an estimate in days).
+"""
+PLAN_PROMPT_TEMPLATE = 'Goal: "%s"'
+BATCH_SYSTEM_PROMPT = """You are an expert project manager AI. Break each of the user's goals into its own complete, logical, sequential task plan.
+Return one entry per goal, in the listed order.
+Each task has an id (starting at 1 within its plan), a name, a desc, deps (ids from the same plan that must finish first) and days (an estimate in days).
+"""
+BATCH_PROMPT_TEMPLATE = "Goals:\n%s"
+PHASES_SYSTEM_PROMPT = """You are an expert project manager AI. Split the user's goal into 2 to 4 sequential project phases.
+Return short phase names, in order.
+"""
+PHASE_SYSTEM_PROMPT = """You are an expert project manager AI. Break one phase of the user's goal into a complete, logical, sequential task plan for that phase only.
+Each task has an id (starting at 1), a name, a desc, deps (ids from this phase that must finish first) and days (an estimate in days).
+"""
+PHASE_PROMPT_TEMPLATE = 'Goal: "%s"\nPhase %d of %d: "%s"'
+
+# Output token budget for one plan; batch requests get one budget per goal.
+MAX_OUTPUT_TOKENS = 2048
+# Upper bound for a whole batch request. Runaway generations stop here instead of
+# decoding until the model's limit.
+MAX_BATCH_OUTPUT_TOKENS = 8192
+
+# Sampling temperature for plan generation. Plans are only cached while this is 0,
+# since a non-zero temperature means repeat calls are expected to differ.
+GENERATION_TEMPERATURE = 0.0
+
+
+class PlanGenerationError(Exception):
+    """Raised when the AI model fails or returns an unusable plan."""
+
+    def __init__(self, message: str, raw: str = None):
+        super().__init__(message)
+        self.raw = raw
+
+
+def normalize_goal(goal: str) -> str:
+    """Normalizes a goal for cache lookups (trimmed, lowercased, single-spaced)."""
+    return " ".join(goal.split()).lower()
+
+
+# Exact-match plans stay cached for a day, and the oldest are evicted past PLAN_CACHE_MAX_ENTRIES.
+PLAN_CACHE_TTL_SECONDS = 24 * 3600
+PLAN_CACHE_MAX_ENTRIES = 512
+
+
+@st.cache_resource
+def _plan_cache() -> dict:
+    """Process-wide exact-match plan cache shared by all sessions: key -> (expires_at, plan)."""
+    return {}
+
+
+def _get_cached_plan(key: tuple):
+    """Returns the cached plan for key, or None if it is missing or expired."""
+    entry = _plan_cache().get(key)
+    if entry is None:
+        return None
+    expires_at, plan_json = entry
+    if expires_at < time.monotonic():
+        _plan_cache().pop(key, None)
+        return None
+    return plan_json
+
+
+def _set_cached_plan(key: tuple, plan_json: dict):
+    """Stores a successfully generated plan in the exact-match cache."""
+    cache = _plan_cache()
+    # Re-inserting moves the key to the end, so iteration order stays oldest-first
+    cache.pop(key, None)
+    while len(cache) >= PLAN_CACHE_MAX_ENTRIES:
+        try:
+            cache.pop(next(iter(cache)), None)
+        except (StopIteration, RuntimeError):
+            # Another session changed the cache mid-eviction; the next insert tries again
+            break
+    cache[key] = (time.monotonic() + PLAN_CACHE_TTL_SECONDS, plan_json)
+
+
+@st.cache_resource
+def _get_model(model_name: str, system_instruction: str = PLAN_SYSTEM_PROMPT):
+    """Returns a GenerativeModel reused across reruns, so its API client is built only once."""
+    return _configure_genai(API_KEY).GenerativeModel(model_name, system_instruction=system_instruction)
+
+
+@st.cache_resource(show_spinner=False)
+def _event_loop() -> asyncio.AbstractEventLoop:
+    """Starts the process-wide event loop that runs every async Gemini call.
+
+    The SDK's async gRPC channel is bound to the loop it was created on. Running all
+    async calls on this one long-lived loop lets the cached models keep that channel
+    (and its TLS session) open, where asyncio.run would need a new channel every time.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="genai-async", daemon=True).start()
+    return loop
+
+
+def _run_async(coro):
+    """Runs a coroutine on the shared event loop and waits for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, _event_loop()).result()
+
+
+# Precompiled scanners for _TaskStreamParser: outside a string only quotes and brackets
+# matter, inside one only quotes and backslashes do. Everything else is skipped by re in C.
+_JSON_STRUCTURE_RE = re.compile(r'["{}\[\]]')
+_JSON_STRING_RE = re.compile(r'["\\]')
+
+
+class _TaskStreamParser:
+    """Incrementally extracts complete task objects from a streamed {"plan": [...]} document."""
+
+    def __init__(self):
+        self.tasks = []
+        self._chunks = []
+        # Only the unparsed tail of the stream is kept for scanning: either the task
+        # currently being written or nothing, so each feed scans and copies new text only
+        self._buffer = ""
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._task_start = -1
+        self._saw_plan = False
+
+    @property
+    def text(self) -> str:
+        """The full model output received so far."""
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> list:
+        """Appends a chunk of model output and returns the tasks it completed."""
+        self._chunks.append(chunk)
+        text = self._buffer + chunk
+        tasks = []
+        pos = self._pos
+        while True:
+            match = (_JSON_STRING_RE if self._in_string else _JSON_STRUCTURE_RE).search(text, pos)
+            if match is None:
+                break
+            i = match.start()
+            char = text[i]
+            pos = i + 1
+            if self._in_string:
+                if char == "\\":
+                    # Skip the escaped character, which may only arrive with the next chunk
+                    pos = i + 2
+                else:
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                # A task is any object opened directly inside the top-level "plan" array
+                if char == "{" and self._stack == ["{", "["]:
+                    self._task_start = i
+                self._stack.append(char)
+                if self._stack == ["{", "["]:
+                    self._saw_plan = True
+            elif self._stack:
+                self._stack.pop()
+                if char == "}" and self._stack == ["{", "["] and self._task_start >= 0:
+                    segment = text[self._task_start:i + 1]
+                    self._task_start = -1
+                    try:
+                        tasks.append(_add_display_fields(_validate_task(_expand_task(orjson.loads(segment)))))
+                    except orjson.JSONDecodeError as je:
+                        raise PlanGenerationError(f"AI failed to return valid JSON: {je}", raw=self.text)
+                    except fastjsonschema.JsonSchemaValueException as ve:
+                        raise PlanGenerationError(f"AI returned an invalid task: {ve.message}", raw=self.text)
+
+        # Drop everything before the unfinished task (or all scanned text between tasks)
+        pos = max(pos, len(text))
+        cut = self._task_start if self._task_start >= 0 else len(text)
+        self._buffer = text[cut:]
+        self._pos = pos - cut
+        if self._task_start >= 0:
+            self._task_start = 0
+        self.tasks.extend(tasks)
+        return tasks
+
+    def finish(self) -> dict:
+        """Returns the collected plan once the stream has ended.
+
+        Every task was already parsed by feed(), so this only checks that the document
+        was closed rather than parsing the whole response a second time.
+        """
+        if not self._saw_plan:
+            raise PlanGenerationError("AI returned JSON in an unexpected format.", raw=self.text)
+        if self._stack or self._in_string:
+            raise PlanGenerationError("AI response ended before the plan was complete.", raw=self.text)
+        return {"plan": self.tasks}
+
+
+def _plan_config(temperature: float) -> dict:
+    """Generation config for a single plan; JSON mode plus the Plan schema fixes the shape."""
+    return {
+        "response_mime_type": "application/json",
+        "response_schema": Plan,
+        "temperature": temperature,
+        "top_p": 1.0,
+        "top_k": 1,
+        "max_output_tokens": MAX_OUTPUT_TOKENS,
+    }
+
+
+def _stream_plan(prompt: str, model_name: str, on_task=None) -> dict:
+    """Streams a plan from the Gemini API, calling on_task for each task as soon as it is complete."""
+    model = _get_model(model_name)
+    response = model.generate_content(
+        contents=prompt,
+        generation_config=_plan_config(GENERATION_TEMPERATURE),
+        stream=True,
+    )
+
+    # Parse tasks as they arrive so they can be shown before the whole plan is written
+    parser = _TaskStreamParser()
+    for chunk in response:
+        for task in parser.feed(chunk.text):
+            if on_task is not None:
+                on_task(task)
+    return parser.finish()
+
+
+# Temperatures raced against each other when a streamed plan comes back unusable.
+RETRY_TEMPERATURES = (0.0, 0.3)
+
+
+async def _request_plan_async(model, prompt: str, temperature: float) -> dict:
+    """Requests a whole plan in one non-streamed call and parses it."""
+    response = await model.generate_content_async(
+        contents=prompt,
+        generation_config=_plan_config(temperature),
+    )
+    parser = _TaskStreamParser()
+    parser.feed(response.text)
+    return parser.finish()
+
+
+async def _race_plan_retries(prompt: str, model_name: str) -> dict:
+    """Retries a plan at each of RETRY_TEMPERATURES concurrently and returns the first valid one."""
+    model = _get_model(model_name)
+    attempts = [
+        asyncio.ensure_future(_request_plan_async(model, prompt, temperature))
+        for temperature in RETRY_TEMPERATURES
+    ]
+    last_error = None
+    try:
+        for attempt in asyncio.as_completed(attempts):
+            try:
+                return await attempt
+            except Exception as e:
+                last_error = e
+    finally:
+        for attempt in attempts:
+            attempt.cancel()
+    raise last_error
+
+
+@st.cache_resource(show_spinner=False)
+def _response_cache():
+    """Opens the on-disk exact-match response cache once per process."""
+    return plan_cache.open_response_cache()
+
+
+@st.cache_resource(show_spinner=False)
+def _semantic_cache() -> plan_cache.PlanCache:
+    """Opens the on-disk semantic plan cache once per process."""
+    return plan_cache.PlanCache()
+
+
+def _embed_goal(goal: str):
+    """Embeds a goal for semantic cache lookups, or returns None if embedding fails."""
+    try:
+        result = _configure_genai(API_KEY).embed_content(
+            model=plan_cache.EMBEDDING_MODEL,
+            content=goal,
+            task_type="SEMANTIC_SIMILARITY",
+        )
+    except Exception:
+        # The cache is an optimization; a failed embedding just means generating afresh
+        return None
+    return plan_cache.normalize_embedding(result["embedding"])
+
+
+# How many recent history rows seed the semantic cache; one batch embed call covers them
+WARM_CACHE_LIMIT = 100
+
+
+@st.cache_resource(show_spinner=False)
+def _warm_semantic_cache(model_name: str) -> int:
+    """Seeds the semantic cache with saved history plans once per model and process.
+
+    Goals the cache has not seen are embedded in a single batch embed_content call
+    instead of one round-trip each. Returns how many plans were added.
+    """
+    history = get_recent_plans(limit=WARM_CACHE_LIMIT)
+    if not history["success"]:
+        return 0
+    plans = {}
+    for row in history["data"]:
+        plan_json = row.get("plan_json")
+        if row.get("model_used") == model_name and isinstance(plan_json, dict) and "plan" in plan_json:
+            plans.setdefault(normalize_goal(row.get("goal") or ""), plan_json)
+    plans.pop("", None)
+
+    cache = _semantic_cache()
+    goals = cache.missing_goals(model_name, plans)
+    if not goals:
+        return 0
+    try:
+        result = _configure_genai(API_KEY).embed_content(
+            model=plan_cache.EMBEDDING_MODEL,
+            content=goals,
+            task_type="SEMANTIC_SIMILARITY",
+        )
+    except Exception:
+        # Warming is best effort; lookups still work against whatever is already stored
+        return 0
+    cache.add_many(
+        model_name,
+        [
+            (goal, plan_cache.normalize_embedding(values), plans[goal])
+            for goal, values in zip(goals, result["embedding"])
+        ],
+    )
+    return len(goals)
+
+
+def _replay_plan(plan_json: dict, on_task=None) -> dict:
+    """Feeds an already complete plan through on_task, as if it had been streamed."""
+    if on_task is not None:
+        for task in plan_json["plan"]:
+            on_task(task)
+    return plan_json
+
+
+@st.cache_resource
+def _in_flight_plans() -> dict:
+    """Process-wide map of cache key -> Future for plans some session is generating right now."""
+    return {}
+
+
+def _generate_uncached_plan(goal_norm: str, model_name: str, prompt: str, on_task=None, on_reset=None) -> dict:
+    """Loads a plan from the persistent caches or generates it, storing the result in every cache."""
+    # Plans persisted on disk by earlier runs, keyed by the exact request
+    cacheable = GENERATION_TEMPERATURE == 0
+    response_key = (
+        plan_cache.response_key(model_name, prompt, GENERATION_TEMPERATURE, PLAN_SYSTEM_PROMPT)
+        if cacheable else None
+    )
+    plan_json = _response_cache().get(response_key) if response_key else None
+
+    # Otherwise reuse the stored plan of a sufficiently similar goal, if enabled
+    embedding = None
+    if plan_json is None and plan_cache.is_enabled():
+        _warm_semantic_cache(model_name)
+        embedding = _embed_goal(goal_norm)
+        if embedding is not None:
+            plan_json = _semantic_cache().lookup(model_name, embedding, plan_cache.similarity_threshold())
+
+    if plan_json is not None:
+        for task in plan_json["plan"]:
+            _add_display_fields(task)
+        return _replay_plan(plan_json, on_task)
+
+    try:
+        plan_json = _stream_plan(prompt, model_name, on_task)
+    except PlanGenerationError:
+        # The streamed output was unusable: discard what was shown and race a
+        # couple of retries, so one extra round-trip covers both attempts
+        if on_reset is not None:
+            on_reset()
+        plan_json = _replay_plan(_run_async(_race_plan_retries(prompt, model_name)), on_task)
+    stored_plan = _strip_display_fields(plan_json)
+    if response_key:
+        _response_cache().set(response_key, stored_plan, expire=plan_cache.RESPONSE_CACHE_EXPIRE_SECONDS)
+    if embedding is not None:
+        _semantic_cache().add(goal_norm, model_name, embedding, stored_plan)
+    return plan_json
+
+
+def generate_plan(goal: str, model_name: str, on_task=None, on_reset=None):
+    """Generates a structured project plan from a user's goal using the Gemini API.
+
+    If on_task is given, it is called with each task as soon as it is available, so the
+    caller can render the plan progressively. Cached plans are replayed through it too.
+    If the streamed plan turns out to be unusable, on_reset is called before the tasks
+    of the retried plan are replayed. Concurrent requests for the same plan share a
+    single generation: later callers wait for the first and replay its result.
+    """
+    goal_norm = normalize_goal(goal or "")
+    if not goal_norm:
         return {"error": "Goal cannot be empty."}
 
-    prompt = f"""
-You are an expert project manager AI. Your task is to break down the user's goal into a structured action plan.
-Goal: "{goal}"
-
-Return ONLY a valid JSON object with this exact structure:
-{{
-  "plan": [
-    {{
-      "task_id": 1,
-      "task_name": "Task name here",
-      "description": "Detailed description here",
-      "dependencies": [],
-      "duration_days": 5
-    }}
-  ]
-}}
-
-Rules:
-- task_id: integer starting from 1
-- task_name: concise string
-- description: detailed string
-- dependencies: array of task_id integers (empty array if none)
-- duration_days: integer
-
-Provide a complete, logical breakdown of the goal into sequential tasks.
-Return ONLY the JSON, no other text or markdown formatting.
-"""
-    
+    # Only deterministic generations are worth caching
+    cacheable = GENERATION_TEMPERATURE == 0
+    cache_key = (model_name, goal_norm) if cacheable else None
+    prompt = PLAN_PROMPT_TEMPLATE % goal_norm
+
     try:
-        model = genai.GenerativeModel(model_name)
-        
-        # Generate content
-        response = model.generate_content(
+        plan_json = _get_cached_plan(cache_key) if cache_key else None
+        if plan_json is not None:
+            return _replay_plan(plan_json, on_task)
+        if not cache_key:
+            return _generate_uncached_plan(goal_norm, model_name, prompt, on_task, on_reset)
+
+        # dict.setdefault is atomic, so exactly one caller becomes the leader for this key
+        in_flight = _in_flight_plans()
+        future = Future()
+        leader_future = in_flight.setdefault(cache_key, future)
+        if leader_future is not future:
+            return _replay_plan(leader_future.result(), on_task)
+
+        try:
+            plan_json = _generate_uncached_plan(goal_norm, model_name, prompt, on_task, on_reset)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        except BaseException:
+            # Streamlit stops or reruns the leader's script; waiters must not inherit that
+            future.set_exception(PlanGenerationError("Generation of this plan was interrupted. Please try again."))
+            raise
+        else:
+            future.set_result(plan_json)
+            _set_cached_plan(cache_key, plan_json)
+        finally:
+            in_flight.pop(cache_key, None)
+        return plan_json
+    except PlanGenerationError as e:
+        return {"error": str(e), "raw": e.raw}
+    except Exception as e:
+        # Catch potential API errors
+        return {"error": f"An error occurred while calling the AI model: {e}"}
+
+
+# Batch mode packs up to GOALS_PER_REQUEST goals into each prompt and keeps at most
+# MAX_CONCURRENT_REQUESTS of those prompts in flight at once to stay within rate limits.
+GOALS_PER_REQUEST = 5
+MAX_CONCURRENT_REQUESTS = 8
+
+
+async def _request_plans(model, goals: list, semaphore: asyncio.Semaphore) -> list:
+    """Plans several goals in a single Gemini call, returning one plan dict per goal in order."""
+    numbered_goals = "\n".join(f"{i}) {goal}" for i, goal in enumerate(goals, start=1))
+    prompt = BATCH_PROMPT_TEMPLATE % numbered_goals
+
+    async with semaphore:
+        response = await model.generate_content_async(
             contents=prompt,
-            generation_config=genai.GenerationConfig(
-                temperature=0.3,
-                top_p=0.95,
-                top_k=40,
-                max_output_tokens=8192,
-            )
+            generation_config={
+                "response_mime_type": "application/json",
+                "response_schema": PlanBatch,
+                "temperature": GENERATION_TEMPERATURE,
+                "top_p": 1.0,
+                "top_k": 1,
+                # Budget scales with the goals actually in this batch
+                "max_output_tokens": min(MAX_BATCH_OUTPUT_TOKENS, MAX_OUTPUT_TOKENS * len(goals)),
+            }
         )
 
-        # Parse the response
-        response_text = response.text.strip()
-        
-        # Try to extract JSON if it's wrapped in markdown code blocks
-        if "```json" in response_text:
-            start = response_text.find("```json") + 7
-            end = response_text.find("```", start)
-            response_text = response_text[start:end].strip()
-        elif response_text.startswith("```"):
-            lines = response_text.split("\n")
-            json_lines = []
-            in_code_block = False
-            for line in lines:
-                if line.startswith("```"):
-                    in_code_block = not in_code_block
-                    continue
-                if in_code_block:
-                    json_lines.append(line)
-            response_text = "\n".join(json_lines).strip()
-        
-        try:
-            plan_json = json.loads(response_text)
-            # Basic validation to ensure the structure is correct
-            if "plan" in plan_json and isinstance(plan_json["plan"], list):
-                return plan_json
-            else:
-                 return {"error": "AI returned JSON in an unexpected format.", "raw": response_text}
-        except json.JSONDecodeError as je:
-            return {"error": f"AI failed to return valid JSON: {je}", "raw": response_text}
+    response_text = response.text
+    try:
+        batch_json = orjson.loads(response_text)
+    except orjson.JSONDecodeError as je:
+        raise PlanGenerationError(f"AI failed to return valid JSON: {je}", raw=response_text)
 
+    plans = batch_json.get("plans") if isinstance(batch_json, dict) else None
+    if not isinstance(plans, list) or len(plans) != len(goals):
+        raise PlanGenerationError(
+            f"AI returned {len(plans) if isinstance(plans, list) else 'no'} plans for {len(goals)} goals.",
+            raw=response_text,
+        )
+    try:
+        batch_plans = [
+            _validate_plan({"plan": [_expand_task(task) for task in entry["plan"]]}) for entry in plans
+        ]
+    except (KeyError, TypeError):
+        raise PlanGenerationError("AI returned a plan in an unexpected format.", raw=response_text)
+    except fastjsonschema.JsonSchemaValueException as ve:
+        raise PlanGenerationError(f"AI returned an invalid plan: {ve.message}", raw=response_text)
+    for plan_json in batch_plans:
+        for task in plan_json["plan"]:
+            _add_display_fields(task)
+    return batch_plans
+
+
+async def _gather_plans(goals: list, model_name: str) -> list:
+    """Splits goals into batched prompts and runs them concurrently, preserving goal order."""
+    model = _get_model(model_name, BATCH_SYSTEM_PROMPT)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    batches = [goals[i:i + GOALS_PER_REQUEST] for i in range(0, len(goals), GOALS_PER_REQUEST)]
+    results = await asyncio.gather(*(_request_plans(model, batch, semaphore) for batch in batches))
+    return [plan_json for batch_plans in results for plan_json in batch_plans]
+
+
+def generate_plans(goals: list, model_name: str):
+    """Generates plans for several goals, packing them into a few concurrent API calls."""
+    goals = [goal.strip() for goal in goals if goal and goal.strip()]
+    if not goals:
+        return {"error": "Enter at least one goal."}
+
+    try:
+        return {"plans": _run_async(_gather_plans(goals, model_name))}
+    except PlanGenerationError as e:
+        return {"error": str(e), "raw": e.raw}
     except Exception as e:
-        # Catch potential API errors
         return {"error": f"An error occurred while calling the AI model: {e}"}
 
 
+# Phased mode asks for at most MAX_PHASES phases in one short call, then plans them all concurrently.
+MAX_PHASES = 4
+PHASES_MAX_OUTPUT_TOKENS = 128
+
+
+async def _request_phases(model_name: str, goal: str) -> list:
+    """Splits a goal into a few sequential phase names with one short Gemini call."""
+    response = await _get_model(model_name, PHASES_SYSTEM_PROMPT).generate_content_async(
+        contents=PLAN_PROMPT_TEMPLATE % goal,
+        generation_config={
+            "response_mime_type": "application/json",
+            "response_schema": PhaseList,
+            "temperature": GENERATION_TEMPERATURE,
+            "top_p": 1.0,
+            "top_k": 1,
+            "max_output_tokens": PHASES_MAX_OUTPUT_TOKENS,
+        }
+    )
+
+    response_text = response.text
+    try:
+        phases = orjson.loads(response_text)["phases"]
+    except (orjson.JSONDecodeError, KeyError, TypeError):
+        raise PlanGenerationError("AI returned phases in an unexpected format.", raw=response_text)
+    phases = [phase.strip() for phase in phases if isinstance(phase, str) and phase.strip()][:MAX_PHASES]
+    if not phases:
+        raise PlanGenerationError("AI returned no phases for this goal.", raw=response_text)
+    return phases
+
+
+def _merge_phase_plans(phase_plans: list) -> dict:
+    """Joins per-phase plans into one plan with sequential task_ids across phases.
+
+    Each phase's ids and dependencies are renumbered after the tasks before it, and a
+    phase's starting tasks (those with no dependencies) wait on the previous phase's last task.
+    """
+    tasks = []
+    for phase_plan in phase_plans:
+        offset = len(tasks)
+        phase_tasks = _order_tasks(phase_plan["plan"])
+        new_ids = {task["task_id"]: offset + i for i, task in enumerate(phase_tasks, start=1)}
+        for task in phase_tasks:
+            dependencies = [new_ids[dep] for dep in task["dependencies"] if dep in new_ids]
+            if not dependencies and offset:
+                dependencies = [offset]
+            merged = {key: value for key, value in task.items() if not key.startswith("_")}
+            merged["task_id"] = new_ids[task["task_id"]]
+            merged["dependencies"] = dependencies
+            tasks.append(_add_display_fields(merged))
+    return {"plan": tasks}
+
+
+async def _gather_phase_plans(goal: str, model_name: str) -> dict:
+    """Plans every phase of a goal concurrently and merges them into one plan."""
+    phases = await _request_phases(model_name, goal)
+    model = _get_model(model_name, PHASE_SYSTEM_PROMPT)
+    phase_plans = await asyncio.gather(*(
+        _request_plan_async(
+            model, PHASE_PROMPT_TEMPLATE % (goal, number, len(phases), phase), GENERATION_TEMPERATURE
+        )
+        for number, phase in enumerate(phases, start=1)
+    ))
+    return _merge_phase_plans(phase_plans)
+
+
+def generate_phased_plan(goal: str, model_name: str, on_task=None):
+    """Generates a plan by splitting the goal into phases and planning them in parallel.
+
+    Long plans finish in roughly the time of their longest phase rather than of the whole
+    plan. Tasks are passed to on_task once the merged plan is complete.
+    """
+    goal_norm = normalize_goal(goal or "")
+    if not goal_norm:
+        return {"error": "Goal cannot be empty."}
+
+    cache_key = (model_name, goal_norm, "phased") if GENERATION_TEMPERATURE == 0 else None
+    try:
+        plan_json = _get_cached_plan(cache_key) if cache_key else None
+        if plan_json is None:
+            plan_json = _run_async(_gather_phase_plans(goal_norm, model_name))
+            if cache_key:
+                _set_cached_plan(cache_key, plan_json)
+        return _replay_plan(plan_json, on_task)
+    except PlanGenerationError as e:
+        return {"error": str(e), "raw": e.raw}
+    except Exception as e:
+        return {"error": f"An error occurred while calling the AI model: {e}"}
+
+
+def _order_tasks(tasks: list) -> list:
+    """Orders tasks by task_id, bucketing them by id in one pass when the ids are exactly 1..n."""
+    buckets = [None] * (len(tasks) + 1)
+    for task in tasks:
+        task_id = task.get("task_id")
+        if type(task_id) is not int or not 0 < task_id < len(buckets) or buckets[task_id] is not None:
+            # Gaps, duplicates or non-integer ids: fall back to a comparison sort
+            try:
+                return sorted(tasks, key=itemgetter("task_id"))
+            except (KeyError, TypeError):
+                # Missing or mixed-type ids cannot be ordered; keep the order they came in
+                return list(tasks)
+        buckets[task_id] = task
+    return buckets[1:]
+
+
+# Shimmering placeholder cards shown while the first task of a plan is on its way
+PLAN_SKELETON_HTML = """<style>
+.plan-skeleton div {
+    height: 2.75rem; margin-bottom: 0.75rem; border-radius: 0.5rem;
+    background: linear-gradient(90deg, rgba(128,128,128,.10) 25%, rgba(128,128,128,.22) 50%, rgba(128,128,128,.10) 75%);
+    background-size: 200% 100%; animation: plan-skeleton 1.4s ease-in-out infinite;
+}
+@keyframes plan-skeleton { from { background-position: 200% 0; } to { background-position: -200% 0; } }
+</style>
+<div class="plan-skeleton">""" + "<div></div>" * 5 + "</div>"
+
+
+def display_task(task: dict):
+    """Displays a single task as an expander."""
+    view = task.get("_view")
+    if view is None:
+        # Plans loaded from the database are stored without display fields
+        view = TaskView.from_task(task)
+
+    with st.expander(view.label):
+        st.markdown(view.body)
+
+
 def display_plan(tasks: list):
     """Displays a plan in an organized format."""
     if not tasks:
@@ -194,18 +910,8 @@ def display_plan(tasks: list):
         return
     
     # Sort tasks by ID for a logical display order
-    sorted_tasks = sorted(tasks, key=lambda x: x.get("task_id", 0))
-    
-    for task in sorted_tasks:
-        task_id = task.get('task_id', '?')
-        task_name = task.get('task_name', 'Unnamed Task')
-        duration = task.get('duration_days', '?')
-        dependencies = task.get("dependencies", [])
-        deps_str = ", ".join(map(str, dependencies)) if dependencies else "None"
-
-        with st.expander(f"**Task {task_id}: {task_name}** ({duration} days)"):
-            st.markdown(f"**Description:** {task.get('description', 'No description provided.')}")
-            st.markdown(f"**Dependencies:** Task(s) {deps_str}")
+    for task in _order_tasks(tasks):
+        display_task(task)
 
 
 # -------------------------
@@ -223,6 +929,11 @@ with tab1:
         "detailed, structured action plan for you."
     )
 
+    batch_mode = st.checkbox("Plan several goals at once (one per line)", key="batch_mode")
+    phased_mode = not batch_mode and st.checkbox(
+        "Plan phases in parallel (faster for long plans)", key="phased_mode"
+    )
+
     # Model selection
     col1, col2 = st.columns([3, 1])
 
@@ -231,25 +942,96 @@ with tab1:
         if "goal_input" not in st.session_state:
             st.session_state.goal_input = "Launch a minimal e-commerce web app in 4 weeks."
 
-        goal_input = st.text_input(
-            "Enter your goal:",
-            key="goal_input"
-        )
+        if batch_mode:
+            goals_input = st.text_area(
+                "Enter your goals:",
+                key="goals_input"
+            )
+        else:
+            goal_input = st.text_input(
+                "Enter your goal:",
+                key="goal_input"
+            )
 
     with col2:
         selected_model_display = st.selectbox(
             "Select Model:",
             options=list(AVAILABLE_MODELS.keys()),
-            index=0  # Default to Gemini 2.0 Flash Experimental
+            index=DEFAULT_MODEL_INDEX
         )
         selected_model = AVAILABLE_MODELS[selected_model_display]
 
     if st.button("Generate Plan", type="primary", use_container_width=True):
-        if goal_input:
-            with st.spinner("🧠 AI is thinking... Please wait."):
-                result = generate_plan(goal_input, selected_model)
+        if batch_mode:
+            goals = [goal.strip() for goal in goals_input.splitlines() if goal.strip()]
+            if goals:
+                with st.spinner(f"🧠 AI is planning {len(goals)} goal(s)... Please wait."):
+                    result = generate_plans(goals, selected_model)
+
+                if "error" in result:
+                    st.error(f'**Error:** {result["error"]}')
+                    if "raw" in result and result["raw"]:
+                        with st.expander("📟 View Raw AI Output"):
+                            st.code(result["raw"], language="text")
+                else:
+                    st.success(f"✅ Here are your {len(goals)} AI-generated action plans:")
+                    failed_saves = []
+                    for goal, plan_json in zip(goals, result["plans"]):
+                        st.subheader(f"🎯 {goal}")
+                        display_plan(plan_json["plan"])
+                        if plan_json["plan"]:
+                            save_result = save_plan_to_db(goal, selected_model, plan_json)
+                            if not save_result["success"]:
+                                failed_saves.append(save_result.get("error", "Unknown error"))
+
+                    if failed_saves:
+                        st.warning(f"⚠️ {len(failed_saves)} plan(s) failed to save: {failed_saves[0]}")
+                    else:
+                        st.success("✅ Plans saved to database!")
+            else:
+                st.warning("Please enter at least one goal first.")
+        elif goal_input:
+            # Tasks are rendered into this area as the model streams them
+            status_placeholder = st.empty()
+            skeleton_placeholder = st.empty()
+            plan_placeholder = st.empty()
+            plan_area = plan_placeholder.container()
+
+            def render_task(task: dict):
+                skeleton_placeholder.empty()
+                with plan_area:
+                    display_task(task)
+
+            def reset_tasks():
+                # Replacing the placeholder's container clears the tasks shown so far
+                global plan_area
+                plan_area = plan_placeholder.container()
+
+            # Repeat clicks on an unchanged goal reuse this session's last plan instead
+            # of calling the model (and saving a duplicate row) again
+            goal_hash = hash((normalize_goal(goal_input), selected_model, phased_mode))
+            is_repeat = (
+                goal_hash == st.session_state.get("_last_goal_hash")
+                and "_last_result" in st.session_state
+            )
+            if is_repeat:
+                result = st.session_state["_last_result"]
+                for task in result["plan"]:
+                    render_task(task)
+            else:
+                # Show the plan's outline right away instead of only a spinner
+                skeleton_placeholder.markdown(PLAN_SKELETON_HTML, unsafe_allow_html=True)
+                with st.spinner("🧠 AI is thinking... Please wait."):
+                    if phased_mode:
+                        result = generate_phased_plan(goal_input, selected_model, on_task=render_task)
+                    else:
+                        result = generate_plan(
+                            goal_input, selected_model, on_task=render_task, on_reset=reset_tasks
+                        )
+                skeleton_placeholder.empty()
 
             if "error" in result:
+                plan_placeholder.empty()
                 st.error(f'**Error:** {result["error"]}')
                 if "raw" in result and result["raw"]:
                     with st.expander("📟 View Raw AI Output"):
@@ -260,17 +1042,21 @@ with tab1:
                 if not tasks:
                     st.warning("The AI generated an empty plan. Try a more specific goal.")
                 else:
-                    st.success("✅ Here is your AI-generated action plan:")
-                    display_plan(tasks)
+                    status_placeholder.success("✅ Here is your AI-generated action plan:")
                     
                     # Save to database
-                    with st.spinner("💾 Saving to database..."):
-                        save_result = save_plan_to_db(goal_input, selected_model, result)
-                        
-                        if save_result["success"]:
-                            st.success("✅ Plan saved to database!")
-                        else:
-                            st.warning(f"⚠️ Plan generated but failed to save: {save_result.get('error', 'Unknown error')}")
+                    if is_repeat:
+                        st.info("This plan was already generated and saved for this goal.")
+                    else:
+                        with st.spinner("💾 Saving to database..."):
+                            save_result = save_plan_to_db(goal_input, selected_model, result)
+                            
+                            if save_result["success"]:
+                                st.session_state["_last_goal_hash"] = goal_hash
+                                st.session_state["_last_result"] = result
+                                st.success("✅ Plan saved to database!")
+                            else:
+                                st.warning(f"⚠️ Plan generated but failed to save: {save_result.get('error', 'Unknown error')}")
             else:
                 st.warning("The AI did not return a valid plan. Please try rephrasing your goal.")
         else:
@@ -330,6 +1116,8 @@ with tab2:
                         if st.button("🗑️ Delete", key=f"delete_{plan_id}"):
                             delete_result = delete_plan(plan_id)
                             if delete_result["success"]:
+                                # The deleted row may be the one the Generate tab would reuse
+                                st.session_state.pop("_last_goal_hash", None)
                                 st.success("Deleted!")
                                 st.rerun()
                             else:
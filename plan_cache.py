@@ -0,0 +1,149 @@
+"""Persistent plan caches that let the app skip Gemini calls across restarts.
+
+The response cache is an exact-match diskcache store keyed by a hash of the request.
+The semantic cache reuses a stored plan when a new goal is close enough to an old one,
+comparing the cosine similarity of their embeddings; its rows live in a local SQLite file.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import diskcache
+import msgpack
+import numpy as np
+import orjson
+
+RESPONSE_CACHE_DIR = ".llm_cache"
+RESPONSE_CACHE_EXPIRE_SECONDS = 30 * 86400
+# Least recently stored entries are culled once the directory grows past this many bytes
+RESPONSE_CACHE_SIZE_LIMIT = 200_000_000
+
+EMBEDDING_MODEL = "models/text-embedding-004"
+SIMILARITY_THRESHOLD = 0.92
+DEFAULT_DB_PATH = "plan_cache.sqlite3"
+
+
+def response_key(model: str, prompt: str, temperature: float, system: str = "") -> str:
+    """Hashes everything that determines a model response into a response cache key."""
+    payload = orjson.dumps(
+        {"model": model, "prompt": prompt, "temp": temperature, "system": system}, option=orjson.OPT_SORT_KEYS
+    )
+    return hashlib.sha256(payload).hexdigest()
+
+
+def open_response_cache(path: str = None) -> diskcache.Cache:
+    """Opens the exact-match response cache directory (LLM_CACHE_PATH, default .llm_cache)."""
+    return diskcache.Cache(
+        path or os.environ.get("LLM_CACHE_PATH", RESPONSE_CACHE_DIR), size_limit=RESPONSE_CACHE_SIZE_LIMIT
+    )
+
+
+def is_enabled() -> bool:
+    """Returns True when the semantic plan cache is switched on via PLAN_CACHE_ENABLED."""
+    return os.environ.get("PLAN_CACHE_ENABLED", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def similarity_threshold() -> float:
+    """Returns the cosine similarity a stored goal needs to be reused (PLAN_CACHE_THRESHOLD)."""
+    try:
+        return float(os.environ.get("PLAN_CACHE_THRESHOLD", SIMILARITY_THRESHOLD))
+    except ValueError:
+        return SIMILARITY_THRESHOLD
+
+
+def normalize_embedding(values) -> np.ndarray:
+    """Returns the embedding as a unit-length float32 vector, so dot products are cosines."""
+    vector = np.asarray(values, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class PlanCache:
+    """SQLite-backed store of (goal, embedding, plan) rows with cosine-similarity lookup."""
+
+    def __init__(self, path: str = None):
+        # Read at construction time, after the app has loaded its .env file
+        path = path or os.environ.get("PLAN_CACHE_PATH", DEFAULT_DB_PATH)
+        # One connection is shared by every Streamlit session thread, guarded by a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS plan_cache (
+                    goal TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    plan_json BLOB NOT NULL,
+                    ts REAL NOT NULL
+                )
+                """
+            )
+            self._conn.commit()
+
+            # Rows are loaded once and kept in memory per model; lookups then score the
+            # stacked embedding matrix without touching SQLite
+            self._goals = {}
+            self._vectors = {}
+            self._plans = {}
+            self._matrices = {}
+            for goal, model, embedding, plan_json in self._conn.execute(
+                "SELECT goal, model, embedding, plan_json FROM plan_cache ORDER BY ts"
+            ):
+                if isinstance(plan_json, str):
+                    # Rows written before plans were stored as MessagePack hold JSON text
+                    plan_json = msgpack.packb(orjson.loads(plan_json), use_bin_type=True)
+                self._remember(goal, model, np.frombuffer(embedding, dtype=np.float32), plan_json)
+
+    def _remember(self, goal: str, model: str, embedding: np.ndarray, plan_json: bytes):
+        """Adds a row to the in-memory index; callers hold the lock."""
+        self._goals.setdefault(model, set()).add(goal)
+        self._vectors.setdefault(model, []).append(embedding)
+        self._plans.setdefault(model, []).append(plan_json)
+        # The stacked matrix is rebuilt on the next lookup
+        self._matrices.pop(model, None)
+
+    def missing_goals(self, model: str, goals) -> list:
+        """Returns the goals that have no stored plan for model yet."""
+        with self._lock:
+            known = self._goals.get(model, ())
+            return [goal for goal in goals if goal not in known]
+
+    def lookup(self, model: str, embedding: np.ndarray, threshold: float = SIMILARITY_THRESHOLD):
+        """Returns the stored plan most similar to embedding, or None if none reaches threshold."""
+        with self._lock:
+            plans = self._plans.get(model)
+            if not plans:
+                return None
+            matrix = self._matrices.get(model)
+            if matrix is None:
+                matrix = self._matrices[model] = np.vstack(self._vectors[model])
+
+        # Score every stored vector with a single matrix-vector product
+        scores = matrix @ embedding
+        best = int(np.argmax(scores))
+        if scores[best] < threshold:
+            return None
+        return msgpack.unpackb(plans[best], raw=False)
+
+    def add(self, goal: str, model: str, embedding: np.ndarray, plan_json: dict):
+        """Stores a generated plan, packed as MessagePack, under its goal embedding."""
+        self.add_many(model, [(goal, embedding, plan_json)])
+
+    def add_many(self, model: str, entries):
+        """Stores several (goal, embedding, plan_json) entries in one transaction."""
+        ts = time.time()
+        rows = [
+            (goal, embedding.astype(np.float32), msgpack.packb(plan_json, use_bin_type=True))
+            for goal, embedding, plan_json in entries
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO plan_cache (goal, model, embedding, plan_json, ts) VALUES (?, ?, ?, ?, ?)",
+                [(goal, model, embedding.tobytes(), plan_json, ts) for goal, embedding, plan_json in rows],
+            )
+            self._conn.commit()
+            for goal, embedding, plan_json in rows:
+                self._remember(goal, model, embedding, plan_json)